@@ -1,153 +1,638 @@
-import requests
+import asyncio
+import aiohttp
+import httpx
 import hashlib
+import logging
 import time
-import json
+import orjson
 import os
+import queue
 import html
 import signal
+import sqlite3
 import sys
+import threading
+import zlib
+from collections import Counter, OrderedDict
 from datetime import datetime
-from difflib import unified_diff
+from fast_diff_match_patch import diff as compute_diff
 
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows, fall back to the default loop
+    uvloop = None
+
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "WebHawkBot/1.0 (+https://github.com/Nano112/WebHawkBot)"
+
+# Returned in place of page content when the server answers 304 Not Modified
+NOT_MODIFIED = object()
+
+# At most this many page entries are kept in memory, the rest stay in the database
+MAX_ENTRIES = 1000
+# Pages larger than this are not stored for diffs, only hashed
+MAX_CONTENT_BYTES = 256_000
+# Escaped URLs in notifications are shortened to this many characters, which
+# together with the 500 character diff keeps each one under Telegram's limit
+MAX_URL_CHARS = 1000
+
+# Pages are hashed in fixed-size blocks so unchanged regions can be skipped when diffing
+BLOCK_SIZE = 4096
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+DB_FILE = os.getenv("WEBHAWK_DB", "webhawk.db")
+
+# Optional comma-separated DNS servers for page fetches, defaults to the system resolver config
+DNS_NAMESERVERS = [ns.strip() for ns in os.getenv("WEBHAWK_NAMESERVERS", "").split(",") if ns.strip()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages(
+    url TEXT PRIMARY KEY,
+    hash TEXT,
+    status INT,
+    etag TEXT,
+    last_modified TEXT,
+    content BLOB,
+    last_checked TEXT,
+    blocks BLOB,
+    size INT
+);
+CREATE TABLE IF NOT EXISTS urls(url TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS settings(key TEXT PRIMARY KEY, value);
+"""
+
+
+def open_database(db_file, check_same_thread=True):
+    """Open the SQLite store in WAL mode, creating the schema if needed"""
+    db = sqlite3.connect(db_file, isolation_level=None, check_same_thread=check_same_thread)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    # Databases created before block hashing lack the blocks column
+    columns = {row[1] for row in db.execute("PRAGMA table_info(pages)")}
+    if "blocks" not in columns:
+        db.execute("ALTER TABLE pages ADD COLUMN blocks BLOB")
+    if "size" not in columns:
+        db.execute("ALTER TABLE pages ADD COLUMN size INT")
+    return db
+
+
+def hash_blocks(data):
+    """Return the concatenated SHA-256 digests of each BLOCK_SIZE block of data"""
+    # Slicing a memoryview hands hashlib the bytes in place instead of copying each block
+    view = memoryview(data)
+    return b''.join(
+        hashlib.sha256(view[i:i + BLOCK_SIZE]).digest()
+        for i in range(0, len(view), BLOCK_SIZE)
+    )
+
+
+def changed_region(old_content, old_blocks, new_content, new_blocks):
+    """Find the byte range that differs between two versions of a page
+
+    Leading blocks with equal digests are skipped. Trailing blocks can only be
+    compared when both versions have the same length, since otherwise the block
+    boundaries no longer line up. Returns (start, old_end, new_end), widened to
+    whole lines.
+    """
+    old_count = len(old_blocks) // DIGEST_SIZE
+    new_count = len(new_blocks) // DIGEST_SIZE
+
+    def block(blocks, i):
+        return blocks[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+
+    prefix = 0
+    while prefix < min(old_count, new_count) and block(old_blocks, prefix) == block(new_blocks, prefix):
+        prefix += 1
+    start = prefix * BLOCK_SIZE
+
+    old_end, new_end = len(old_content), len(new_content)
+    if old_end == new_end:
+        suffix = 0
+        while (old_count - suffix > prefix
+               and block(old_blocks, old_count - 1 - suffix) == block(new_blocks, new_count - 1 - suffix)):
+            suffix += 1
+        old_end = new_end = min(old_end, (old_count - suffix) * BLOCK_SIZE)
+
+    # Widen to line boundaries so the diff shows whole lines
+    start = old_content.rfind(b'\n', 0, start) + 1
+    old_end = old_content.find(b'\n', old_end) + 1 or len(old_content)
+    new_end = new_content.find(b'\n', new_end) + 1 or len(new_content)
+    return start, old_end, new_end
+
+
+PAGE_COLUMNS = "url, hash, status, etag, last_modified, content, last_checked, blocks, size"
+
+
+def entry_from_row(row):
+    """Build a stored hash entry from a pages row selected with PAGE_COLUMNS"""
+    _, page_hash, status_code, etag, last_modified, content, last_checked, blocks, size = row
+    entry = {
+        "hash": page_hash,
+        "status_code": status_code,
+        "etag": etag,
+        "last_modified": last_modified,
+        "last_checked": last_checked
+    }
+    if blocks is not None:
+        entry["blocks"] = blocks
+    if size is not None:
+        entry["size"] = size
+    if content is not None:
+        entry["content"] = content
+    return entry
+
+
+def pack_content(content):
+    """Compress page content for storage"""
+    return zlib.compress(content, 1)
+
+
+def unpack_content(content):
+    """Decompress stored page content, passing through content stored uncompressed by older versions"""
+    if isinstance(content, bytes):
+        try:
+            return zlib.decompress(content)
+        except zlib.error:
+            return content
+    return content
+
+
+def load_legacy_json(path):
+    """Read a JSON file written by older versions, or None if there is none"""
+    try:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+class BackgroundWriter:
+    """Applies database writes on a background thread, off the monitor loop
+
+    Writes are tagged with a key; when several writes for the same key are
+    queued, only the last one is applied. Each drained batch is committed as
+    a single transaction.
+    """
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # Opened here so a broken database fails loudly at startup instead of
+        # killing the thread and leaving flush() waiting forever
+        self._db = open_database(db_file, check_same_thread=False)
+        self._queue = queue.Queue()
+        # Number of queued, not yet applied writes per key
+        self._queued = Counter()
+        self._queued_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def execute(self, key, sql, params=()):
+        """Queue a write and return immediately"""
+        with self._queued_lock:
+            self._queued[key] += 1
+        self._queue.put((key, sql, params))
+
+    def is_pending(self, key):
+        """Return True if a write for the key is queued but not applied yet"""
+        with self._queued_lock:
+            return self._queued[key] > 0
+
+    def flush(self):
+        """Block until every queued write has been applied"""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Apply outstanding writes and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        db = self._db
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Keep the last write per key, moved to the position of its latest occurrence
+            pending = {}
+            for item in items:
+                if item is None:
+                    stopping = True
+                    continue
+                key, sql, params = item
+                pending.pop(key, None)
+                pending[key] = (sql, params)
+
+            try:
+                with db:
+                    db.execute("BEGIN")
+                    for sql, params in pending.values():
+                        db.execute(sql, params)
+            except Exception as e:
+                # Drop the batch but keep the thread alive for later writes
+                print(f"Error writing to database: {e}")
+            finally:
+                with self._queued_lock:
+                    for item in items:
+                        if item is not None:
+                            self._queued[item[0]] -= 1
+                            if not self._queued[item[0]]:
+                                del self._queued[item[0]]
+                for _ in items:
+                    self._queue.task_done()
+        db.close()
+
 
 class URLManager:
     """Manages the list of URLs to monitor and configuration settings"""
-    def __init__(self, config_file="monitor_config.json"):
-        self.config_file = config_file
+    def __init__(self, db_file=DB_FILE, legacy_config_file="monitor_config.json"):
+        self.db_file = db_file
+        self.legacy_config_file = legacy_config_file
+        self.db = open_database(db_file)
+        self.writer = BackgroundWriter(db_file)
         self.urls = []
+        self._url_set = set()  # Mirrors self.urls for O(1) membership checks
         self.interval = 300  # 5 minutes default
         self.store_content = False
         self.load_config()
 
     def load_config(self):
-        """Load configuration from file"""
-        try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-                self.urls = config.get('urls', [])
-                self.interval = config.get('interval', 300)
-                self.store_content = config.get('store_content', False)
-        except FileNotFoundError:
+        """Load configuration from the database"""
+        settings = dict(self.db.execute("SELECT key, value FROM settings"))
+        if not settings:
+            # First run on this database: import an old JSON config if present
+            config = load_legacy_json(self.legacy_config_file) or {}
+            self.urls = list(dict.fromkeys(config.get('urls', [])))  # Drop duplicates, keep order
+            self.interval = config.get('interval', 300)
+            self.store_content = config.get('store_content', False)
+            self._url_set = set(self.urls)
             self.save_config()
+            return
+
+        self.urls = [row[0] for row in self.db.execute("SELECT url FROM urls ORDER BY rowid")]
+        self._url_set = set(self.urls)
+        self.interval = settings.get('interval', 300)
+        self.store_content = bool(settings.get('store_content', False))
 
     def save_config(self):
-        """Save configuration to file"""
-        config = {
-            'urls': self.urls,
-            'interval': self.interval,
-            'store_content': self.store_content,
-            'last_updated': datetime.now().isoformat()
-        }
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        """Save the full configuration to the database"""
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM urls")
+            self.db.executemany("INSERT INTO urls(url) VALUES(?)", [(url,) for url in self.urls])
+            self.db.executemany(
+                "INSERT OR REPLACE INTO settings(key, value) VALUES(?, ?)",
+                [('interval', self.interval), ('store_content', self.store_content),
+                 ('last_updated', datetime.now().isoformat())]
+            )
+
+    def save_setting(self, key, value):
+        """Save a single setting and bump the last updated timestamp"""
+        sql = "INSERT OR REPLACE INTO settings(key, value) VALUES(?, ?)"
+        self.writer.execute(('setting', key), sql, (key, value))
+        self.writer.execute(('setting', 'last_updated'), sql, ('last_updated', datetime.now().isoformat()))
 
     def add_url(self, url):
         """Add a URL to monitor"""
-        if url not in self.urls:
+        if url not in self._url_set:
+            self._url_set.add(url)
             self.urls.append(url)
-            self.save_config()
+            self.writer.execute(('url', url), "INSERT OR IGNORE INTO urls(url) VALUES(?)", (url,))
             return True
         return False
 
     def remove_url(self, url):
         """Remove a URL from monitoring"""
-        if url in self.urls:
+        if url in self._url_set:
+            self._url_set.discard(url)
             self.urls.remove(url)
-            self.save_config()
+            self.writer.execute(('url', url), "DELETE FROM urls WHERE url = ?", (url,))
             return True
         return False
 
     def clear_urls(self):
         """Clear all URLs"""
         self.urls = []
-        self.save_config()
+        self._url_set.clear()
+        self.writer.execute(('urls',), "DELETE FROM urls")
 
     def set_interval(self, interval):
         """Set check interval in seconds"""
         self.interval = max(30, interval)  # Minimum 30 seconds
-        self.save_config()
+        self.save_setting('interval', self.interval)
 
     def toggle_content_storage(self):
         """Toggle content storage for diffs"""
         self.store_content = not self.store_content
-        self.save_config()
+        self.save_setting('store_content', self.store_content)
         return self.store_content
 
 
 class WebpageMonitor:
+    HELP_TEXT = """🦅 <b>WebHawkBot Commands</b>
+
+<b>URL Management:</b>
+• <code>/add &lt;url&gt;</code> - Add URL to monitor
+• <code>/remove &lt;url&gt;</code> or <code>/rm &lt;url&gt;</code> - Remove URL
+• <code>/list</code> or <code>/ls</code> - List monitored URLs
+• <code>/clear</code> - Clear all URLs
+
+<b>Settings:</b>
+• <code>/interval &lt;seconds&gt;</code> - Set check interval (min 30s)
+• <code>/content</code> or <code>/diff</code> - Toggle content storage for diffs
+• <code>/status</code> - Show current status and settings
+
+<b>Control:</b>
+• <code>/stop</code> - Stop monitoring
+• <code>/help</code> - Show this help
+
+<b>Example:</b>
+<code>/add https://example.com</code>
+<code>/interval 600</code> (10 minutes)"""
+
+    STATUS_TEMPLATE = """📊 <b>WebHawkBot Status</b>
+
+<b>Monitoring:</b> {running}
+<b>URLs:</b> {url_count}
+<b>Check Interval:</b> {interval}s ({interval_min}min)
+<b>Content Storage:</b> {content}
+<b>Last Config Update:</b> {updated}
+
+<b>URLs:</b>
+{urls}"""
+
     def __init__(self, bot_token, chat_id, url_manager=None):
         self.bot_token = bot_token
         self.chat_id = chat_id
+        # Incoming updates carry numeric chat ids, so compare against an int
+        try:
+            self._chat_id_int = int(chat_id)
+        except ValueError:
+            self._chat_id_int = None
+            print(f"⚠️  Warning: chat id {chat_id!r} is not numeric, commands will be ignored")
         self.telegram_api = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        self.hashes_file = "page_hashes.json"
+        self.legacy_hashes_file = "page_hashes.json"
         self.url_manager = url_manager or URLManager()
+        self.db = self.url_manager.db
+        self.writer = self.url_manager.writer
         self.load_hashes()
         self.running = False
-        
-        # Validate credentials on initialization
-        if not self.validate_credentials():
-            print("⚠️  Warning: Telegram credentials may be invalid. Messages may fail to send.")
+        self._pending_messages = []
+
+        # HTTP clients must be created inside the running event loop,
+        # so they are opened and closed by _monitor_async
+        self.tg_client = None
+        self.http_session = None
+        self._loop = None
+        self._stop_event = None
+
+        # Command dispatch table, all handlers take the command arguments
+        self._commands = {
+            '/start': self.get_help_text,
+            '/help': self.get_help_text,
+            '/add': self.handle_add_url,
+            '/remove': self.handle_remove_url,
+            '/rm': self.handle_remove_url,
+            '/list': self.handle_list_urls,
+            '/ls': self.handle_list_urls,
+            '/clear': self.handle_clear_urls,
+            '/interval': self.handle_set_interval,
+            '/int': self.handle_set_interval,
+            '/content': self.handle_toggle_content,
+            '/diff': self.handle_toggle_content,
+            '/status': self.handle_status,
+            '/stop': self.handle_stop
+        }
     
     def load_hashes(self):
-        """Load previously stored hashes from file"""
-        try:
-            with open(self.hashes_file, 'r') as f:
-                self.stored_hashes = json.load(f)
-        except FileNotFoundError:
-            self.stored_hashes = {}
+        """Load the most recently checked hashes from the database"""
+        self.stored_hashes = OrderedDict()
+
+        if self.db.execute("SELECT 1 FROM pages LIMIT 1").fetchone() is None:
+            # First run on this database: import old JSON hashes if present
+            for url, entry in (load_legacy_json(self.legacy_hashes_file) or {}).items():
+                self.stored_hashes[url] = entry
+                self.save_hash(url)
+            self.stored_hashes.clear()
+            self.writer.flush()
+
+        rows = self.db.execute(
+            f"SELECT {PAGE_COLUMNS} FROM pages ORDER BY last_checked DESC LIMIT ?", (self.cache_size(),)
+        ).fetchall()
+        for row in reversed(rows):
+            self.stored_hashes[row[0]] = entry_from_row(row)
+
+    def get_entry(self, url):
+        """Return the stored entry for a URL, loading it from the database if it is not cached"""
+        entry = self.stored_hashes.get(url)
+        if entry is not None:
+            self.stored_hashes.move_to_end(url)
+            return entry
+
+        # The row may still be waiting in the writer queue
+        if self.writer.is_pending(('page', url)):
+            self.writer.flush()
+        row = self.db.execute(f"SELECT {PAGE_COLUMNS} FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        entry = entry_from_row(row)
+        self.cache_entry(url, entry)
+        return entry
+
+    def cache_size(self):
+        """Number of entries to keep cached, at least one per monitored URL
+
+        A cache smaller than the URL list would miss on every check of a
+        round and hit the database each time.
+        """
+        return max(MAX_ENTRIES, len(self.url_manager.urls))
+
+    def cache_entry(self, url, entry):
+        """Cache an entry, evicting the least recently used ones beyond cache_size()"""
+        self.stored_hashes[url] = entry
+        self.stored_hashes.move_to_end(url)
+        while len(self.stored_hashes) > self.cache_size():
+            self.stored_hashes.popitem(last=False)
     
-    def save_hashes(self):
-        """Save current hashes to file"""
-        with open(self.hashes_file, 'w') as f:
-            json.dump(self.stored_hashes, f, indent=2)
+    def save_hash(self, url):
+        """Save the stored hash entry for a single URL"""
+        entry = self.stored_hashes[url]
+        self.writer.execute(
+            ('page', url),
+            f"INSERT OR REPLACE INTO pages({PAGE_COLUMNS}) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, entry.get("hash"), entry.get("status_code"), entry.get("etag"), entry.get("last_modified"),
+             entry.get("content"), entry.get("last_checked"), entry.get("blocks"), entry.get("size"))
+        )
     
-    def get_page_content(self, url):
-        """Fetch webpage content and return content with status code"""
+    def get_conditional_headers(self, url):
+        """Build If-None-Match/If-Modified-Since headers from the stored validators"""
+        stored = self.get_entry(url)
+        if not stored:
+            return {}
+        # Without stored content a 304 would leave us with nothing to diff against,
+        # unless the page is too large to have its content stored anyway
+        oversized = stored.get("size") is not None and stored["size"] > MAX_CONTENT_BYTES
+        if self.url_manager.store_content and "content" not in stored and not oversized:
+            return {}
+
+        headers = {}
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        return headers
+
+    async def _fetch(self, session, url):
+        """Fetch a webpage, hashing the body block by block as it streams in
+
+        Returns the URL, the page hash (SHA-256 over the block digests), the
+        block digests, the body bytes (only kept when content storage is
+        enabled and the page fits in MAX_CONTENT_BYTES), the status code, the
+        cache validators and the body length.
+        """
         try:
-            response = requests.get(url, timeout=10)
-            # Don't raise for status here - we want to track status code changes
-            return response.text, response.status_code
-        except requests.RequestException as e:
+            async with session.get(url, headers=self.get_conditional_headers(url)) as response:
+                if response.status == 304:
+                    return url, None, None, NOT_MODIFIED, 304, {}, None
+                # Don't raise for status here - we want to track status code changes
+                keep_content = self.url_manager.store_content
+                blocks = []
+                chunks = []
+                size = 0
+                pending = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    size += len(chunk)
+                    if keep_content:
+                        if size > MAX_CONTENT_BYTES:
+                            # Too large to store, stop holding the body in memory
+                            keep_content = False
+                            chunks.clear()
+                        else:
+                            chunks.append(chunk)
+                    view = memoryview(chunk)
+                    if pending:
+                        # Complete the partial block left over from the previous chunk
+                        take = BLOCK_SIZE - len(pending)
+                        pending += view[:take]
+                        view = view[take:]
+                        if len(pending) < BLOCK_SIZE:
+                            continue
+                        blocks.append(hashlib.sha256(pending).digest())
+                        pending.clear()
+                    # Hash whole blocks straight from the chunk, only the tail is buffered
+                    full = len(view) - len(view) % BLOCK_SIZE
+                    blocks.append(hash_blocks(view[:full]))
+                    pending += view[full:]
+                if pending:
+                    blocks.append(hash_blocks(pending))
+                blocks = b''.join(blocks)
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+                content = b''.join(chunks) if keep_content else None
+                return url, hashlib.sha256(blocks).hexdigest(), blocks, content, response.status, validators, size
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"Error fetching {url}: {e}")
-            return None, None
-    
-    def calculate_hash(self, content):
-        """Calculate SHA-256 hash of content"""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
-    
+            return url, None, None, None, None, {}, None
+
     def get_diff(self, old_content, new_content):
-        """Generate a simple diff between old and new content"""
-        old_lines = old_content.splitlines(keepends=True)
-        new_lines = new_content.splitlines(keepends=True)
-        diff = unified_diff(old_lines, new_lines, lineterm='', n=1)
-        diff_text = ''.join(list(diff)[:20])  # Limit to first 20 lines
+        """Generate a simple line diff between old and new content"""
+        if isinstance(old_content, bytes):
+            old_content = old_content.decode('utf-8', errors='replace')
+        if isinstance(new_content, bytes):
+            new_content = new_content.decode('utf-8', errors='replace')
+
+        # Cap the input so a huge page cannot stall the monitor loop, then map
+        # every distinct line to one character so the diff works line by line
+        line_ids = {}
+
+        def encode(text):
+            if len(text) > 200_000:
+                # Cut at a line boundary, or hard at the limit if there is none
+                cut = text.rfind('\n', 0, 200_000)
+                text = text[:cut if cut > 0 else 200_000]
+            chars = []
+            for line in text.splitlines():
+                if line not in line_ids:
+                    index = len(line_ids)
+                    # Skip the surrogate range, which is not valid in UTF-8
+                    line_ids[line] = chr(index if index < 0xD800 else index + 0x800)
+                chars.append(line_ids[line])
+            return ''.join(chars)
+
+        ops = compute_diff(encode(old_content), encode(new_content), timelimit=1.0, counts_only=False)
+        line_of = {char: line for line, char in line_ids.items()}
+
+        diff_lines = []
+        for op, chars in ops:
+            if op == '=':
+                # Unchanged lines only separate the changes
+                if diff_lines and diff_lines[-1] != '...':
+                    diff_lines.append('...')
+                continue
+            diff_lines.extend(f"{op}{line_of[char]}" for char in chars)
+            if len(diff_lines) >= 20:
+                break
+        diff_text = '\n'.join(diff_lines[:20]).removesuffix('\n...')  # Limit to first 20 lines
         return diff_text if diff_text else "Content changed (diff too large to display)"
-    
-    def validate_credentials(self):
+
+    async def post_message(self, payload):
+        """POST a payload to sendMessage, encoding the JSON body with orjson"""
+        return await self.tg_client.post(
+            self.telegram_api,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        )
+
+    async def validate_credentials(self):
         """Validate Telegram bot token and chat_id"""
         try:
             test_payload = {
                 "chat_id": self.chat_id,
                 "text": "🧪 WebHawkBot validation test"
             }
-            response = requests.post(self.telegram_api, json=test_payload, timeout=10)
+            response = await self.post_message(test_payload)
             if response.status_code == 200:
                 print("✓ Telegram credentials validated successfully")
                 return True
             else:
                 print(f"❌ Telegram validation failed: {response.status_code} - {response.text}")
                 return False
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"❌ Could not validate Telegram credentials: {e}")
             return False
     
-    def escape_html(self, text):
-        """Escape HTML characters for Telegram HTML parse mode"""
-        return html.escape(str(text))
+    def escape_html(self, text, limit=None):
+        """Escape HTML characters for Telegram HTML parse mode
+
+        With a limit, the escaped text is shortened to at most that many
+        characters without cutting an entity in half.
+        """
+        if not isinstance(text, str):
+            text = str(text)
+        # Escaped text never lands inside attributes, so quotes can stay as-is
+        escaped = html.escape(text, quote=False)
+        if limit is not None and len(escaped) > limit:
+            escaped = escaped[:limit - 3]
+            # Entities are at most 5 characters long (&amp;), so a cut one starts in the last 4
+            amp = escaped.rfind('&', len(escaped) - 4)
+            if amp != -1 and ';' not in escaped[amp:]:
+                escaped = escaped[:amp]
+            escaped += "..."
+        return escaped
     
     def process_command(self, command_text):
         """Process a command from Telegram"""
@@ -159,49 +644,14 @@ class WebpageMonitor:
         command = parts[0].lower()
         args = parts[1:]
 
-        if command == '/start' or command == '/help':
-            return self.get_help_text()
-        elif command == '/add':
-            return self.handle_add_url(args)
-        elif command == '/remove' or command == '/rm':
-            return self.handle_remove_url(args)
-        elif command == '/list' or command == '/ls':
-            return self.handle_list_urls()
-        elif command == '/clear':
-            return self.handle_clear_urls()
-        elif command == '/interval' or command == '/int':
-            return self.handle_set_interval(args)
-        elif command == '/content' or command == '/diff':
-            return self.handle_toggle_content()
-        elif command == '/status':
-            return self.handle_status()
-        elif command == '/stop':
-            return self.handle_stop()
-        else:
+        handler = self._commands.get(command)
+        if handler is None:
             return f"❌ Unknown command: {command}\n\n{self.get_help_text()}"
+        return handler(args)
 
-    def get_help_text(self):
+    def get_help_text(self, args=None):
         """Get help text for commands"""
-        return """🦅 <b>WebHawkBot Commands</b>
-
-<b>URL Management:</b>
-• <code>/add &lt;url&gt;</code> - Add URL to monitor
-• <code>/remove &lt;url&gt;</code> or <code>/rm &lt;url&gt;</code> - Remove URL
-• <code>/list</code> or <code>/ls</code> - List monitored URLs
-• <code>/clear</code> - Clear all URLs
-
-<b>Settings:</b>
-• <code>/interval &lt;seconds&gt;</code> - Set check interval (min 30s)
-• <code>/content</code> or <code>/diff</code> - Toggle content storage for diffs
-• <code>/status</code> - Show current status and settings
-
-<b>Control:</b>
-• <code>/stop</code> - Stop monitoring
-• <code>/help</code> - Show this help
-
-<b>Example:</b>
-<code>/add https://example.com</code>
-<code>/interval 600</code> (10 minutes)"""
+        return self.HELP_TEXT
 
     def handle_add_url(self, args):
         """Handle /add command"""
@@ -228,7 +678,7 @@ class WebpageMonitor:
         else:
             return f"❌ URL not found in monitoring list:\n{self.escape_html(url)}"
 
-    def handle_list_urls(self):
+    def handle_list_urls(self, args=None):
         """Handle /list command"""
         if not self.url_manager.urls:
             return "📝 No URLs currently being monitored\n\nUse <code>/add &lt;url&gt;</code> to add some!"
@@ -236,7 +686,7 @@ class WebpageMonitor:
         url_list = "\n".join(f"• {self.escape_html(url)}" for url in self.url_manager.urls)
         return f"📋 <b>Monitored URLs ({len(self.url_manager.urls)}):</b>\n{url_list}"
 
-    def handle_clear_urls(self):
+    def handle_clear_urls(self, args=None):
         """Handle /clear command"""
         count = len(self.url_manager.urls)
         self.url_manager.clear_urls()
@@ -256,120 +706,137 @@ class WebpageMonitor:
         except ValueError:
             return "❌ Please provide a valid number of seconds"
 
-    def handle_toggle_content(self):
+    def handle_toggle_content(self, args=None):
         """Handle /content command"""
         new_state = self.url_manager.toggle_content_storage()
         status = "ENABLED" if new_state else "DISABLED"
         return f"📄 Content storage for diffs: {status}\n\n{'✅ Will show detailed changes in notifications' if new_state else 'ℹ️ Will only show hash changes'}"
 
-    def handle_status(self):
+    def handle_status(self, args=None):
         """Handle /status command"""
-        status = f"""📊 <b>WebHawkBot Status</b>
-
-<b>Monitoring:</b> {'🟢 ACTIVE' if self.running else '🔴 STOPPED'}
-<b>URLs:</b> {len(self.url_manager.urls)}
-<b>Check Interval:</b> {self.url_manager.interval}s ({self.url_manager.interval//60}min)
-<b>Content Storage:</b> {'✅ Enabled' if self.url_manager.store_content else '❌ Disabled'}
-<b>Last Config Update:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-<b>URLs:</b>
-{self.handle_list_urls() if self.url_manager.urls else 'None'}"""
-
-        return status
+        return self.STATUS_TEMPLATE.format_map({
+            'running': '🟢 ACTIVE' if self.running else '🔴 STOPPED',
+            'url_count': len(self.url_manager.urls),
+            'interval': self.url_manager.interval,
+            'interval_min': self.url_manager.interval // 60,
+            'content': '✅ Enabled' if self.url_manager.store_content else '❌ Disabled',
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'urls': self.handle_list_urls() if self.url_manager.urls else 'None'
+        })
 
-    def handle_stop(self):
+    def handle_stop(self, args=None):
         """Handle /stop command"""
-        self.running = False
+        self.stop()
         return "🛑 Monitoring stopped. Use the script to restart."
 
-    def get_updates(self, offset=None):
-        """Get updates from Telegram"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-        params = {"timeout": 30}
-        if offset:
-            params["offset"] = offset
-
-        try:
-            response = requests.get(url, params=params, timeout=35)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Failed to get updates: {response.status_code}")
-                return None
-        except requests.RequestException as e:
-            print(f"Error getting updates: {e}")
-            return None
+    def stop(self):
+        """Stop monitoring, waking the monitor loop if it is waiting"""
+        self.running = False
+        # Safe to call from signal handlers and other threads
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
 
-    def process_updates(self):
-        """Process incoming Telegram updates"""
+    async def process_updates(self):
+        """Process incoming Telegram updates, returning False if they could not be fetched"""
         # Use a class variable to track the last update ID
         if not hasattr(self, 'last_update_id'):
             self.last_update_id = 0
 
-        updates = self.get_updates(offset=self.last_update_id + 1)
-        if updates and updates.get("ok"):
+        updates = await self.get_updates(offset=self.last_update_id + 1)
+        if updates is None:
+            return False
+        if updates.get("ok"):
             result_count = len(updates.get("result", []))
             if result_count > 0:
-                print(f"📨 Received {result_count} update(s) from Telegram")
+                logger.debug("📨 Received %d update(s) from Telegram", result_count)
 
             for update in updates.get("result", []):
                 self.last_update_id = update["update_id"]
-                print(f"🔍 Processing update ID: {update['update_id']}")
+                logger.debug("🔍 Processing update ID: %s", update["update_id"])
 
                 # Handle both regular messages and channel posts
                 message = None
                 if "message" in update:
                     message = update["message"]
-                    print("📨 Received regular message")
+                    logger.debug("📨 Received regular message")
                 elif "channel_post" in update:
                     message = update["channel_post"]
-                    print("📢 Received channel post")
+                    logger.debug("📢 Received channel post")
 
                 if message:
                     chat_id = message["chat"]["id"]
                     text = message.get("text", "")
 
-                    print(f"📨 Message from chat {chat_id}: '{text}' (configured chat: {self.chat_id})")
+                    logger.debug("📨 Message from chat %s: %r (configured chat: %s)", chat_id, text, self.chat_id)
 
                     # Only respond to messages from our configured chat
-                    if str(chat_id) == str(self.chat_id):
+                    if chat_id == self._chat_id_int:
                         if text.startswith('/'):
-                            print(f"⚡ Processing command: {text}")
+                            logger.info("⚡ Processing command: %s", text)
                             response = self.process_command(text)
-                            print(f"📤 Sending response: {response[:100]}...")
-                            self.send_telegram_message(response)
+                            logger.debug("📤 Sending response: %.100s...", response)
+                            await self.send_telegram_message(response)
                         else:
-                            print(f"ℹ️  Ignoring non-command message: {text}")
+                            logger.debug("ℹ️  Ignoring non-command message: %s", text)
                     else:
-                        print(f"❌ Ignoring message from unauthorized chat {chat_id}")
+                        logger.info("❌ Ignoring message from unauthorized chat %s", chat_id)
                 else:
-                    print(f"ℹ️  Update has no message or channel_post field: {update.keys()}")
+                    logger.debug("ℹ️  Update has no message or channel_post field: %s", list(update))
         else:
-            # Only print if there are actual errors
-            if updates and not updates.get("ok"):
-                print(f"❌ Update error: {updates.get('description', 'Unknown error')}")
+            print(f"❌ Update error: {updates.get('description', 'Unknown error')}")
+            return False
+        return True
 
-    def get_updates(self, offset=None):
+    async def poll_updates(self):
+        """Long-poll Telegram for commands until monitoring stops"""
+        while self.running:
+            try:
+                ok = await self.process_updates()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the poller alive; a dead task would silently stop command handling
+                print(f"Error processing updates: {e}")
+                ok = False
+            if not ok:
+                # Back off instead of hammering the API while it is unreachable
+                await asyncio.sleep(5)
+
+    async def get_updates(self, offset=None):
         """Get updates from Telegram"""
         url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-        params = {"timeout": 10}  # Shorter timeout for responsive checking
+        # Telegram holds the request open for up to 50s until an update arrives
+        params = {"timeout": 50}
         if offset:
             params["offset"] = offset
 
         try:
-            response = requests.get(url, params=params, timeout=15)
+            response = await self.tg_client.get(url, params=params, timeout=55.0)
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             else:
                 print(f"Failed to get updates: {response.status_code}")
                 return None
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError covers orjson.JSONDecodeError from a non-JSON 200 response
             print(f"Error getting updates: {e}")
             return None
 
+    async def flush_messages(self):
+        """Send all queued notifications, packing as many as fit into each message"""
+        separator = "\n\n---\n\n"
+        max_length = 4000
+        pending, self._pending_messages = self._pending_messages, []
+        batch = ""
+        for message in pending:
+            if batch and len(batch) + len(separator) + len(message) > max_length:
+                await self.send_telegram_message(batch)
+                batch = ""
+            batch = f"{batch}{separator}{message}" if batch else message
+        if batch:
+            await self.send_telegram_message(batch)
 
-    
-    def send_telegram_message(self, message):
+    async def send_telegram_message(self, message):
         """Send message via Telegram bot"""
         try:
             # Split message if it's too long (Telegram has 4096 char limit)
@@ -382,10 +849,10 @@ class WebpageMonitor:
                 "text": message,
                 "parse_mode": "HTML"
             }
-            response = requests.post(self.telegram_api, json=payload)
+            response = await self.post_message(payload)
             response.raise_for_status()
-            print(f"✓ Notification sent at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        except requests.RequestException as e:
+            print(f"✓ Notification sent at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        except httpx.HTTPError as e:
             print(f"Error sending Telegram message: {e}")
             # Try sending without HTML formatting as fallback
             try:
@@ -395,10 +862,10 @@ class WebpageMonitor:
                     "chat_id": self.chat_id,
                     "text": plain_text
                 }
-                response = requests.post(self.telegram_api, json=payload_fallback)
+                response = await self.post_message(payload_fallback)
                 response.raise_for_status()
                 print(f"✓ Fallback message sent (without HTML formatting)")
-            except requests.RequestException as fallback_error:
+            except httpx.HTTPError as fallback_error:
                 print(f"Fallback message also failed: {fallback_error}")
                 # Try to validate bot token and chat_id
                 try:
@@ -406,7 +873,7 @@ class WebpageMonitor:
                         "chat_id": self.chat_id,
                         "text": "Test message from WebHawkBot"
                     }
-                    response = requests.post(self.telegram_api, json=test_payload)
+                    response = await self.post_message(test_payload)
                     if response.status_code == 400:
                         print("❌ Bot token or chat_id appears to be invalid")
                         print("Please check your TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
@@ -415,71 +882,151 @@ class WebpageMonitor:
                 except Exception as test_error:
                     print(f"❌ Could not validate credentials: {test_error}")
     
-    def check_page(self, url, store_content=False):
-        """Check if a webpage has changed"""
+    def check_page(self, url, current_hash, blocks, content, status_code, validators=None, store_content=False,
+                   now_iso=None, now_fmt=None, size=None):
+        """Check a fetched page for changes, queueing a notification if it changed
+
+        now_iso and now_fmt let a sweep share one timestamp across all of its pages.
+        size is the body length, needed when an oversized body was not kept.
+        """
         print(f"Checking {url}...")
+        if now_iso is None or now_fmt is None:
+            now = datetime.now()
+            now_iso, now_fmt = now.isoformat(), now.strftime('%Y-%m-%d %H:%M:%S')
         
-        content, status_code = self.get_page_content(url)
-        if content is None or status_code is None:
+        if status_code is None:
             return
-        
-        current_hash = self.calculate_hash(content)
+
+        stored = self.get_entry(url)
+
+        # Server confirmed the page is unchanged, no need to hash anything
+        if content is NOT_MODIFIED:
+            print("✓ No changes detected (not modified)")
+            if stored is not None:
+                stored["last_checked"] = now_iso
+                self.save_hash(url)
+            return
+
+        # Content is only kept when storage was enabled at fetch time, and
+        # pages too large to store fall back to hash-only change detection
+        if size is None and content is not None:
+            size = len(content)
+        oversized = size is not None and size > MAX_CONTENT_BYTES
+        store_content = store_content and content is not None and not oversized
         
         # First time checking this URL
-        if url not in self.stored_hashes:
-            self.stored_hashes[url] = {
+        if stored is None:
+            stored = {
                 "hash": current_hash,
+                "blocks": blocks,
+                "size": size,
                 "status_code": status_code,
-                "last_checked": datetime.now().isoformat()
+                "last_checked": now_iso
             }
+            stored.update(validators or {})
             if store_content:
-                self.stored_hashes[url]["content"] = content
-            self.save_hashes()
-            message = f"🆕 <b>Started monitoring:</b>\n{self.escape_html(url)}\n\nStatus: {status_code}\nHash: {current_hash[:16]}..."
-            self.send_telegram_message(message)
+                stored["content"] = pack_content(content)
+            self.cache_entry(url, stored)
+            self.save_hash(url)
+            self._pending_messages.append(
+                f"🆕 <b>Started monitoring:</b>\n{self.escape_html(url, MAX_URL_CHARS)}\n\nStatus: {status_code}\nHash: {current_hash[:16]}..."
+            )
             return
         
         # Check if content or status code has changed
-        content_changed = current_hash != self.stored_hashes[url]["hash"]
-        status_changed = status_code != self.stored_hashes[url].get("status_code")
+        content_changed = current_hash != stored["hash"]
+        rebaselined = "blocks" not in stored
+        if rebaselined:
+            # Stored by a version that hashed the whole body, so the hashes
+            # are not comparable: adopt the new version as the baseline
+            content_changed = False
+            stored["hash"] = current_hash
+            stored["blocks"] = blocks
+            stored["size"] = size
+            if store_content:
+                stored["content"] = pack_content(content)
+            else:
+                stored.pop("content", None)
+        status_changed = status_code != stored.get("status_code")
         
         if content_changed or status_changed:
             print(f"⚠️  Change detected on {url}")
             
             message = f"🔔 <b>PAGE CHANGE DETECTED!</b>\n\n"
-            message += f"<b>URL:</b> {self.escape_html(url)}\n"
-            message += f"<b>Time:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            message += f"<b>URL:</b> {self.escape_html(url, MAX_URL_CHARS)}\n"
+            message += f"<b>Time:</b> {now_fmt}\n"
             
             if status_changed:
-                old_status = self.stored_hashes[url].get("status_code", "Unknown")
+                old_status = stored.get("status_code", "Unknown")
                 message += f"<b>Status Code:</b> {old_status} → {status_code}\n"
             else:
                 message += f"<b>Status Code:</b> {status_code}\n"
             
             if content_changed:
-                message += f"<b>Old hash:</b> {self.stored_hashes[url]['hash'][:16]}...\n"
+                message += f"<b>Old hash:</b> {stored['hash'][:16]}...\n"
                 message += f"<b>New hash:</b> {current_hash[:16]}...\n"
             
             # Add diff if we stored the content and content actually changed
-            if content_changed and store_content and "content" in self.stored_hashes[url]:
-                diff = self.get_diff(self.stored_hashes[url]["content"], content)
+            if content_changed and store_content and "content" in stored:
+                old_content = unpack_content(stored["content"])
+                if isinstance(old_content, bytes):
+                    # Only diff the region covered by blocks that actually changed. The stored
+                    # digests may describe a newer version than the stored content (changes seen
+                    # while content storage was off), so hash the stored bytes themselves
+                    start, old_end, new_end = changed_region(old_content, hash_blocks(old_content), content, blocks)
+                    diff = self.get_diff(old_content[start:old_end], content[start:new_end])
+                else:
+                    diff = self.get_diff(old_content, content)
                 message += f"\n<b>Content Changes:</b>\n<code>{self.escape_html(diff[:500])}</code>"
-            elif status_changed and not content_changed:
+            elif status_changed and not content_changed and not rebaselined:
                 message += f"\n<b>Note:</b> Only status code changed, content remains the same"
             
-            self.send_telegram_message(message)
-            
             # Update stored hash and status code
-            self.stored_hashes[url]["hash"] = current_hash
-            self.stored_hashes[url]["status_code"] = status_code
-            self.stored_hashes[url]["last_checked"] = datetime.now().isoformat()
+            stored["hash"] = current_hash
+            stored["blocks"] = blocks
+            stored["size"] = size
+            stored["status_code"] = status_code
+            stored["last_checked"] = now_iso
+            stored.update(validators or {})
             if store_content:
-                self.stored_hashes[url]["content"] = content
-            self.save_hashes()
+                stored["content"] = pack_content(content)
+            elif oversized:
+                # Don't diff a later version against stale content
+                stored.pop("content", None)
+            self.save_hash(url)
+            self._pending_messages.append(message)
         else:
             print(f"✓ No changes detected")
-            self.stored_hashes[url]["last_checked"] = datetime.now().isoformat()
-            self.save_hashes()
+            stored["size"] = size
+            stored["last_checked"] = now_iso
+            stored.update(validators or {})
+            if store_content and "content" not in stored:
+                stored["content"] = pack_content(content)
+            self.save_hash(url)
+
+    async def check_pages(self):
+        """Fetch all monitored URLs concurrently and report any changes in one batch"""
+        urls = list(self.url_manager.urls)
+        results = await asyncio.gather(
+            *[self._fetch(self.http_session, url) for url in urls],
+            return_exceptions=True
+        )
+
+        now = datetime.now()
+        now_iso, now_fmt = now.isoformat(), now.strftime('%Y-%m-%d %H:%M:%S')
+
+        for url, result in zip(urls, results):
+            if not self.running:  # Check if we should stop
+                break
+            if isinstance(result, BaseException):
+                print(f"Error fetching {url}: {result}")
+                continue
+            _, current_hash, blocks, content, status_code, validators, size = result
+            self.check_page(url, current_hash, blocks, content, status_code, validators,
+                            store_content=self.url_manager.store_content, now_iso=now_iso, now_fmt=now_fmt,
+                            size=size)
+
+        await self.flush_messages()
     
     def monitor(self):
         """
@@ -491,35 +1038,86 @@ class WebpageMonitor:
         print(f"Content storage: {'Enabled' if self.url_manager.store_content else 'Disabled'}")
         print(f"Press Ctrl+C to stop\n")
 
-        # Send initial status
-        self.send_telegram_message(f"🟢 <b>WebHawkBot Started</b>\n\n{self.handle_status()}")
+        run = uvloop.run if uvloop is not None else asyncio.run
+        try:
+            run(self._monitor_async())
+        except KeyboardInterrupt:
+            print("\n\nMonitoring stopped by user")
+        finally:
+            # Make sure queued database writes land before exiting
+            self.writer.close()
+
+    async def _monitor_async(self):
+        """Event loop side of monitor(): owns the HTTP clients and the check/command loop"""
+        # Resolve hostnames asynchronously through c-ares (aiodns) and cache
+        # them, since the same hosts are polled every cycle. aiodns needs a
+        # selector loop on Windows, so the default Proactor loop keeps
+        # aiohttp's threaded resolver
+        connector_options = {}
+        if sys.platform != "win32" or isinstance(asyncio.get_running_loop(), asyncio.SelectorEventLoop):
+            resolver_options = {"nameservers": DNS_NAMESERVERS} if DNS_NAMESERVERS else {}
+            connector_options["resolver"] = aiohttp.AsyncResolver(**resolver_options)
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=50,
+                use_dns_cache=True,
+                ttl_dns_cache=600,
+                **connector_options
+            ),
+            # Time spent waiting for a free pooled connection must not count,
+            # so only connecting and each socket read are bounded
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=10),
+            headers={"User-Agent": USER_AGENT}
+        )
+        # Telegram is a single host, so HTTP/2 lets the long poll and
+        # sendMessage calls share one multiplexed connection
+        self.tg_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=30.0
+        )
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        poller = None
 
         try:
+            if not await self.validate_credentials():
+                print("⚠️  Warning: Telegram credentials may be invalid. Messages may fail to send.")
+
+            # Send initial status
+            await self.send_telegram_message(f"🟢 <b>WebHawkBot Started</b>\n\n{self.handle_status()}")
+
+            # Commands are handled concurrently while URL checks wait
+            poller = asyncio.create_task(self.poll_updates())
+
             while self.running:
                 # Check URLs if any are configured
                 if self.url_manager.urls:
-                    for url in self.url_manager.urls:
-                        if not self.running:  # Check if we should stop
-                            break
-                        self.check_page(url, store_content=self.url_manager.store_content)
+                    await self.check_pages()
 
-                # Wait for next check or process commands
+                # Wait for next check, waking early if monitoring is stopped
                 wait_time = self.url_manager.interval if self.url_manager.urls else 60
-                start_time = time.time()
-
-                while time.time() - start_time < wait_time and self.running:
-                    # Process any pending commands
-                    self.process_updates()
-                    time.sleep(1)
-
-                if self.url_manager.urls:
+                if self.url_manager.urls and self.running:
                     print(f"\nWaiting {self.url_manager.interval} seconds until next check...\n")
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=wait_time)
+                except asyncio.TimeoutError:
+                    pass
 
-        except KeyboardInterrupt:
-            print("\n\nMonitoring stopped by user")
         finally:
             self.running = False
-            self.send_telegram_message("🔴 <b>WebHawkBot Stopped</b>")
+            await self.send_telegram_message("🔴 <b>WebHawkBot Stopped</b>")
+            if poller is not None:
+                poller.cancel()
+                try:
+                    await poller
+                except (asyncio.CancelledError, Exception):
+                    # Never let the poller's fate skip closing the clients below
+                    pass
+            self._loop = None
+            self._stop_event = None
+            await self.tg_client.aclose()
+            await self.http_session.close()
 
 
 # Example usage
@@ -538,6 +1136,13 @@ if __name__ == "__main__":
         print("\nFor Docker/Dockploy, set environment variables in your deployment config")
         exit(1)
     
+    # Only configure our own logger: httpx logs request URLs at INFO, and
+    # Telegram API URLs contain the bot token
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(log_handler)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
     print("✓ Credentials loaded successfully")
     
     # Create URL manager and monitor
@@ -547,7 +1152,7 @@ if __name__ == "__main__":
     # Setup graceful shutdown
     def signal_handler(signum, frame):
         print("\n\n� Received shutdown signal...")
-        monitor.running = False
+        monitor.stop()
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)